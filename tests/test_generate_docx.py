@@ -3,13 +3,22 @@
 from unittest.mock import MagicMock, mock_open, patch
 
 import pytest
-from docx import Document
-from docx.oxml import CT_Hyperlink
-
-from update_state_list.generate_docx import (add_hyperlink,
-                                             generate_docx,
-                                             main,
-                                             _add_category_row)
+from docx import Document, opc
+from docx.oxml import CT_Hyperlink, parse_xml
+from docx.oxml.ns import nsdecls
+
+from update_state_list.generate_docx import (
+    CHART_URL_PREFIX,
+    CHART_URL_SUFFIX,
+    MAP_URL_PREFIX,
+    MAP_URL_SUFFIX,
+    _category_row_xml,
+    add_hyperlink,
+    generate_docx,
+    hyperlink_rid_cache,
+    main,
+    relate_hyperlink,
+)
 
 
 class TestAddHyperlink:
@@ -28,8 +37,12 @@ class TestAddHyperlink:
             True
         )
 
-        assert hyperlink is not None
         assert isinstance(hyperlink, CT_Hyperlink)
+        assert hyperlink.getparent() is paragraph._p
+        assert doc.part.rels[hyperlink.rId].target_ref == "https://example.com"
+        assert hyperlink.xpath("w:r/w:rPr/w:color/@w:val") == ["FF0000"]
+        assert not hyperlink.xpath("w:r/w:rPr/w:u")
+        assert paragraph.text == "Test Link"
 
     def test_add_hyperlink_without_underline(self):
         """Test adding hyperlink without underline."""
@@ -44,7 +57,7 @@ class TestAddHyperlink:
             False
         )
 
-        assert hyperlink is not None
+        assert hyperlink.xpath("w:r/w:rPr/w:u/@w:val") == ["none"]
 
     def test_add_hyperlink_without_color(self):
         """Test adding hyperlink without color."""
@@ -59,12 +72,135 @@ class TestAddHyperlink:
             False
         )
 
-        assert hyperlink is not None
+        assert not hyperlink.xpath("w:r/w:rPr/w:color")
+
+    def test_add_hyperlink_reuses_cached_rid(self):
+        """Test that hyperlinks to the same URL share one relationship."""
+        doc = Document()
+        paragraph = doc.add_paragraph()
+        rid_cache = hyperlink_rid_cache(doc.part)
+
+        first = add_hyperlink(
+            paragraph, "https://example.com", "A", None, False, rid_cache
+        )
+        second = add_hyperlink(
+            paragraph, "https://example.com", "B", None, False, rid_cache
+        )
+
+        assert first.rId == second.rId
+        assert rid_cache == {"https://example.com": first.rId}
+
+    def test_add_hyperlink_with_part(self):
+        """Test that a given part is used instead of the paragraph's."""
+        doc = Document()
+        paragraph = MagicMock()
+        paragraph._p = parse_xml(f"<w:p {nsdecls('w')}/>")
+
+        hyperlink = add_hyperlink(
+            paragraph, "https://example.com", "A", None, False, part=doc.part
+        )
+
+        assert doc.part.rels[hyperlink.rId].target_ref == "https://example.com"
+        assert hyperlink.getparent() is paragraph._p
+
+
+class TestRelateHyperlink:
+    """Tests for hyperlink_rid_cache and relate_hyperlink functions."""
+
+    def test_new_rids_do_not_collide(self):
+        """Test that new relationships get unused rIds."""
+        doc = Document()
+        existing = set(doc.part.rels)
+        rid_cache = hyperlink_rid_cache(doc.part)
+
+        r_ids = [
+            relate_hyperlink(doc.part, f"https://example.com/{i}", rid_cache)
+            for i in range(3)
+        ]
+
+        assert len(set(r_ids)) == 3
+        assert not existing & set(r_ids)
+
+    def test_existing_hyperlinks_are_reused(self):
+        """Test that the cache is seeded with the part's hyperlinks."""
+        doc = Document()
+        r_id = doc.part.relate_to(
+            "https://example.com",
+            opc.constants.RELATIONSHIP_TYPE.HYPERLINK,
+            is_external=True,
+        )
+
+        rid_cache = hyperlink_rid_cache(doc.part)
+
+        assert rid_cache == {"https://example.com": r_id}
+        assert (
+            relate_hyperlink(doc.part, "https://example.com", rid_cache)
+            == r_id
+        )
 
 
 class TestGenerateDocx:
     """Tests for generate_docx function."""
 
+    def test_generate_docx_writes_table(self, tmp_path):
+        """Test the table rows, numbering and hyperlinks of the document."""
+        csv_file = tmp_path / "birds.csv"
+        csv_file.write_text(
+            "speciesCode,order,familyComName,comName,sciName,State Status,"
+            "subspecies\n"
+            "gockin,Passeriformes,Kinglets,Golden-crowned Kinglet,"
+            "Regulus satrapa,Common,False\n"
+            "gockin1,Passeriformes,Kinglets,Golden-crowned Kinglet (x),"
+            "Regulus satrapa x,,True\n"
+            "rucroc,Passeriformes,Kinglets,Ruby-crowned Kinglet,"
+            "Corthylio calendula,Common,False\n",
+            encoding="utf-8",
+        )
+
+        generate_docx(str(csv_file))
+
+        table = Document(str(tmp_path / "birds.docx")).tables[0]
+        assert [row.cells[0].text for row in table.rows] == [
+            "#",
+            "Order: Passeriformes",
+            "Family: Kinglets",
+            "1",
+            "",
+            "2",
+        ]
+        assert all(
+            cell.paragraphs[0].runs[0].bold for cell in table.rows[0].cells
+        )
+        assert table.rows[5].cells[1].text == "Ruby-crowned Kinglet"
+        assert table.rows[5].cells[2].text == "Corthylio calendula"
+        assert len(table.rows[5].cells[4].paragraphs[0].hyperlinks) == 1
+        assert (
+            table.rows[5].cells[1].paragraphs[0].hyperlinks[0].url
+            == "https://ebird.org/species/rucroc/US-VA"
+        )
+
+        # One external relationship per distinct URL, all used by the table
+        part = table.part
+        hyperlinks = {
+            r_id: rel.target_ref
+            for r_id, rel in part.rels.items()
+            if rel.is_external
+            and rel.reltype == opc.constants.RELATIONSHIP_TYPE.HYPERLINK
+        }
+        assert sorted(hyperlinks.values()) == sorted(
+            url
+            for code in ("gockin", "gockin1", "rucroc")
+            for url in (
+                f"https://ebird.org/species/{code}/US-VA",
+                MAP_URL_PREFIX + code + MAP_URL_SUFFIX,
+                CHART_URL_PREFIX + code + CHART_URL_SUFFIX,
+            )
+        )
+        # pylint: disable=W0212
+        assert sorted(
+            table._tbl.xpath(".//w:hyperlink/@r:id")
+        ) == sorted(hyperlinks)
+
     @pytest.fixture
     def sample_csv_data(self):
         """Sample CSV data for testing."""
@@ -90,10 +226,9 @@ class TestGenerateDocx:
         ]
 
     @patch('update_state_list.generate_docx.Document')
-    @patch("update_state_list.generate_docx.add_hyperlink")
     @patch('builtins.open', new_callable=mock_open)
     @patch('csv.DictReader')
-    def test_generate_docx_creates_document(self, mock_csv, _, __ , mock_doc):
+    def test_generate_docx_creates_document(self, mock_csv, _, mock_doc):
         """Test that generate_docx creates a document."""
         mock_csv.return_value = [
             {
@@ -115,10 +250,9 @@ class TestGenerateDocx:
         mock_doc_instance.save.assert_called_once_with("test.docx")
 
     @patch('update_state_list.generate_docx.Document')
-    @patch("update_state_list.generate_docx.add_hyperlink")
     @patch('builtins.open', new_callable=mock_open)
     @patch('csv.DictReader')
-    def test_generate_docx_handles_subspecies(self, mock_csv, _, __, mock_doc):
+    def test_generate_docx_handles_subspecies(self, mock_csv, _, mock_doc):
         """Test that subspecies are handled correctly."""
         mock_csv.return_value = [
             {
@@ -151,52 +285,40 @@ class TestMain:
         main()
         mock_generate.assert_called_once_with('test.csv')
 
-class TestAddCategoryRow:
-    """Tests for _add_category_row function."""
+class TestCategoryRowXml:
+    """Tests for _category_row_xml function."""
 
-    def test_add_category_row_creates_merged_cell(self):
-        """Test that _add_category_row creates a merged cell."""
+    @staticmethod
+    def parse_row(text, color):
+        """Parse the row returned by _category_row_xml."""
+        return parse_xml(
+            f'<w:tbl {nsdecls("w")}>'
+            f"{_category_row_xml(text, color, [720] * 6)}</w:tbl>"
+        )[0]
 
-        doc = Document()
-        table = doc.add_table(rows=1, cols=6)
-
-        _add_category_row(table, "Order: Passeriformes", "D3D3D3")
-
-        # Should have 2 rows now (header + category row)
-        assert len(table.rows) == 2
-
-    def test_add_category_row_sets_text(self):
-        """Test that _add_category_row sets the correct text."""
-
-        doc = Document()
-        table = doc.add_table(rows=1, cols=6)
+    def test_category_row_is_one_merged_cell(self):
+        """Test that the category row is a single cell spanning the table."""
+        row = self.parse_row("Order: Passeriformes", "D3D3D3")
 
-        _add_category_row(table, "Family: Kinglets", "ADD8E6")
+        assert len(row.tc_lst) == 1
+        assert row.tc_lst[0].grid_span == 6
+        assert row.xpath("./w:tc/w:tcPr/w:tcW/@w:w") == [str(720 * 6)]
 
-        merged_cell = table.rows[1].cells[0]
-        assert merged_cell.text == "Family: Kinglets"
+    def test_category_row_text_is_bold(self):
+        """Test that the category row has the text in bold."""
+        row = self.parse_row("Family: Kinglets", "ADD8E6")
 
-    def test_add_category_row_makes_text_bold(self):
-        """Test that _add_category_row makes text bold."""
+        assert row.xpath("string(.//w:t)") == "Family: Kinglets"
+        assert row.xpath("./w:tc/w:p/w:r/w:rPr/w:b")
 
-        doc = Document()
-        table = doc.add_table(rows=1, cols=6)
-
-        _add_category_row(table, "Order: Test", "D3D3D3")
-
-        merged_cell = table.rows[1].cells[0]
-        assert merged_cell.paragraphs[0].runs[0].bold is True
-
-    def test_add_category_row_with_different_colors(self):
-        """Test that _add_category_row works with different colors."""
-
-        doc = Document()
-        table = doc.add_table(rows=1, cols=6)
+    def test_category_row_shading(self):
+        """Test that the category row is shaded with the given color."""
+        for color in ("D3D3D3", "ADD8E6"):
+            row = self.parse_row("Order: Test", color)
+            assert row.xpath("./w:tc/w:tcPr/w:shd/@w:fill") == [color]
 
-        # Test with order color
-        _add_category_row(table, "Order: Test", "D3D3D3")
-        assert len(table.rows) == 2
+    def test_category_row_escapes_text(self):
+        """Test that markup characters in the text are escaped."""
+        row = self.parse_row("Ducks & Geese <x>", "ADD8E6")
 
-        # Test with family color
-        _add_category_row(table, "Family: Test", "ADD8E6")
-        assert len(table.rows) == 3
+        assert row.xpath("string(.//w:t)") == "Ducks & Geese <x>"
@@ -7,6 +7,7 @@ from unittest.mock import patch
 
 import pytest
 from update_state_list.generate_html import (
+    escape_html,
     main,
     write_taxonomy_header,
     write_family_header,
@@ -23,6 +24,14 @@ def mock_file_pointer():
     return StringIO()
 
 
+def test_escape_html():
+    """Test that special characters are escaped in one pass."""
+    assert escape_html('<a href="x">A & B\'s</a>') == (
+        "&lt;a href=&quot;x&quot;&gt;A &amp; B&#x27;s&lt;/a&gt;"
+    )
+    assert escape_html("American Robin") == "American Robin"
+
+
 class TestWriteTaxonomyHeader:
     """Tests for write_taxonomy_header function."""
 
@@ -117,6 +126,20 @@ class TestWriteTaxon:
         assert '<td align="center">' in output
         assert 'Resident' in output
 
+    def test_write_taxon_escapes_names(self, mock_file_pointer):
+        """Test that names are escaped in the taxon row."""
+        write_taxon(
+            mock_file_pointer,
+            "x",
+            "1",
+            "Kinglet <x> & Co",
+            "Regulus <i>",
+            "Resident",
+        )
+        output = mock_file_pointer.getvalue()
+        assert "Kinglet &lt;x&gt; &amp; Co" in output
+        assert "Regulus &lt;i&gt;" in output
+
 
 class TestGenerateHtml:
     """Tests for generate_html function."""
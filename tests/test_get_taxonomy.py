@@ -2,53 +2,182 @@
 Tests  update_state_list/get_taxonomy.py
 """
 
+import gzip
 import json
+import os
+import tempfile
 from unittest import TestCase, mock
 
 import update_state_list.get_taxonomy
 
 
 class TestGetTaxonomy(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_file = os.path.join(
+            directory.name, "update_state_list", "taxonomy.json.gz"
+        )
+        patcher = mock.patch(
+            "update_state_list.get_taxonomy.CACHE_FILE", self.cache_file
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_ebird_taxonomy(self):
         """tests the function with that name"""
-        test_json = {"comName": "value"}
-        # Test case for when does not exist
-        with (
-            mock.patch(
-                "update_state_list.get_taxonomy.os.path.isfile"
-            ) as mock_isfile,
-            mock.patch(
-                "builtins.open",
-                mock.mock_open(read_data=json.dumps(test_json)),
-            ) as mock_file,
-            mock.patch(
-                "update_state_list.get_taxonomy.get_taxonomy"
-            ) as mock_get_taxonomy,
-        ):
-            mock_isfile.return_value = True
+        test_json = [{"comName": "value"}]
+        # Cache does not exist
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy:
             mock_get_taxonomy.return_value = test_json
             taxonomy = update_state_list.get_taxonomy.ebird_taxonomy("key")
-            mock_file.assert_called_with(
-                ".cache/taxonomy.json", encoding="utf-8", mode="rt"
-            )
+            mock_get_taxonomy.assert_called_once_with("key", category=None)
             self.assertEqual(taxonomy, test_json)
-        # Cache does not exist
-        with (
-            mock.patch(
-                "update_state_list.get_taxonomy.os.path.isfile"
-            ) as mock_isfile,
-            mock.patch(
-                "builtins.open",
-                mock.mock_open(read_data=json.dumps(test_json)),
-            ) as mock_file,
-            mock.patch(
-                "update_state_list.get_taxonomy.get_taxonomy"
-            ) as mock_get_taxonomy,
-        ):
-            mock_isfile.return_value = False
-            mock_get_taxonomy.return_value = test_json
+        self.assertFalse(os.path.exists(self.cache_file + ".tmp"))
+        with gzip.open(self.cache_file, mode="rt", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), test_json)
+        # Test case for when the cache exists
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy:
             taxonomy = update_state_list.get_taxonomy.ebird_taxonomy("key")
-            mock_file.assert_called_with(
-                ".cache/taxonomy.json", encoding="utf-8", mode="wt"
+            mock_get_taxonomy.assert_not_called()
+            self.assertEqual(taxonomy, test_json)
+
+    def test_ebird_taxonomy_refetches_stale_cache(self):
+        """tests that a cache older than max_age_days is fetched again"""
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy:
+            mock_get_taxonomy.return_value = [{"comName": "old"}]
+            update_state_list.get_taxonomy.ebird_taxonomy("key")
+        stale = os.path.getmtime(self.cache_file) - 3 * 24 * 60 * 60
+        os.utime(self.cache_file, (stale, stale))
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy:
+            mock_get_taxonomy.return_value = [{"comName": "new"}]
+            self.assertEqual(
+                update_state_list.get_taxonomy.ebird_taxonomy(
+                    "key", max_age_days=5
+                ),
+                [{"comName": "old"}],
+            )
+            mock_get_taxonomy.assert_not_called()
+            self.assertEqual(
+                update_state_list.get_taxonomy.ebird_taxonomy(
+                    "key", max_age_days=2
+                ),
+                [{"comName": "new"}],
             )
+            mock_get_taxonomy.assert_called_once_with("key", category=None)
+        self.assertEqual(
+            update_state_list.get_taxonomy.read_cache(self.cache_file),
+            [{"comName": "new"}],
+        )
+
+    def test_ebird_taxonomy_uses_stale_cache_on_fetch_error(self):
+        """tests that a stale cache is used when fetching fails"""
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy:
+            mock_get_taxonomy.return_value = [{"comName": "old"}]
+            update_state_list.get_taxonomy.ebird_taxonomy("key")
+        stale = os.path.getmtime(self.cache_file) - 400 * 24 * 60 * 60
+        os.utime(self.cache_file, (stale, stale))
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy, self.assertLogs(level="WARNING"):
+            mock_get_taxonomy.side_effect = OSError("network is unreachable")
+            self.assertEqual(
+                update_state_list.get_taxonomy.ebird_taxonomy("key"),
+                [{"comName": "old"}],
+            )
+            mock_get_taxonomy.assert_called_once_with("key", category=None)
+        self.assertEqual(os.path.getmtime(self.cache_file), stale)
+
+    def test_ebird_taxonomy_fetch_error_without_cache(self):
+        """tests that a fetch error is raised when there is no cache"""
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy:
+            mock_get_taxonomy.side_effect = OSError("network is unreachable")
+            with self.assertRaises(OSError):
+                update_state_list.get_taxonomy.ebird_taxonomy("key")
+
+    def test_ebird_taxonomy_compact_cache(self):
+        """tests that the cache is compact JSON that round trips"""
+        test_json = [{"comName": "Gr\u00e9be", "taxonOrder": 1.5}]
+        with mock.patch(
+            "update_state_list.get_taxonomy.get_taxonomy"
+        ) as mock_get_taxonomy:
+            mock_get_taxonomy.return_value = test_json
+            update_state_list.get_taxonomy.ebird_taxonomy("key")
+        with gzip.open(self.cache_file, mode="rb") as f:
+            self.assertNotIn(b" ", f.read())
+        self.assertEqual(
+            update_state_list.get_taxonomy.read_cache(self.cache_file),
+            test_json,
+        )
+
+    def test_read_cache_missing(self):
+        """tests that a missing cache reads as None"""
+        self.assertIsNone(
+            update_state_list.get_taxonomy.read_cache(self.cache_file)
+        )
+
+    def test_ebird_taxonomy_refetches_corrupt_cache(self):
+        """tests that an unreadable cache is fetched again and rewritten"""
+        test_json = [{"comName": "value"}]
+        os.makedirs(os.path.dirname(self.cache_file))
+        with gzip.open(self.cache_file, mode="wb") as f:
+            f.write(b'[{"comName": "value"}]')
+        with open(self.cache_file, "rb") as f:
+            truncated = f.read()[:-8]
+        for contents in (b"not gzip", truncated, gzip.compress(b"[{")):
+            with open(self.cache_file, "wb") as f:
+                f.write(contents)
+            with mock.patch(
+                "update_state_list.get_taxonomy.get_taxonomy"
+            ) as mock_get_taxonomy, self.assertLogs(level="WARNING"):
+                mock_get_taxonomy.return_value = test_json
+                taxonomy = update_state_list.get_taxonomy.ebird_taxonomy("key")
+                mock_get_taxonomy.assert_called_once_with("key", category=None)
             self.assertEqual(taxonomy, test_json)
+            self.assertEqual(
+                update_state_list.get_taxonomy.read_cache(self.cache_file),
+                test_json,
+            )
+
+    def test_cache_file_for(self):
+        """tests the function with that name"""
+        self.assertEqual(
+            update_state_list.get_taxonomy.cache_file_for(), self.cache_file
+        )
+        self.assertEqual(
+            update_state_list.get_taxonomy.cache_file_for("species,issf"),
+            self.cache_file.replace(".json", "_species_issf.json"),
+        )
+
+    def test_cache_file_for_json_in_directory(self):
+        """tests that only the file name gets the category suffix"""
+        cache_file = os.path.join("a.json", "taxonomy.json.gz")
+        with mock.patch(
+            "update_state_list.get_taxonomy.CACHE_FILE", cache_file
+        ):
+            self.assertEqual(
+                update_state_list.get_taxonomy.cache_file_for("species"),
+                os.path.join("a.json", "taxonomy_species.json.gz"),
+            )
+
+    def test_get_taxonomy(self):
+        """tests the function with that name"""
+        with mock.patch("ebird.api.get_taxonomy") as mock_get_taxonomy:
+            mock_get_taxonomy.return_value = [{"comName": "value"}]
+            taxonomy = update_state_list.get_taxonomy.get_taxonomy(
+                "key", category="species"
+            )
+            mock_get_taxonomy.assert_called_once_with("key", category="species")
+            self.assertEqual(taxonomy, [{"comName": "value"}])
@@ -0,0 +1,77 @@
+"""Tests for official_list module."""
+
+from update_state_list.official_list import (
+    FAMILY,
+    HISTORICAL,
+    ORDER,
+    SPECIES,
+    walk_official_list,
+)
+
+
+def _bird(order, family, status="", subspecies="False"):
+    return {
+        "order": order,
+        "familyComName": family,
+        "State Status": status,
+        "subspecies": subspecies,
+    }
+
+
+def test_walk_official_list_headers_and_numbering():
+    """Test order and family headers and the species numbering."""
+    birds = [
+        _bird("O1", "F1"),
+        _bird("O1", "F1", subspecies="True"),
+        _bird("O1", "F2"),
+        _bird("O2", "F2"),
+    ]
+
+    events = [
+        (kind, text) for kind, text, _ in walk_official_list(birds)
+    ]
+
+    assert events == [
+        (ORDER, "O1"),
+        (FAMILY, "F1"),
+        (SPECIES, "1"),
+        (SPECIES, ""),
+        (FAMILY, "F2"),
+        (SPECIES, "2"),
+        (ORDER, "O2"),
+        (FAMILY, "F2"),
+        (SPECIES, "3"),
+    ]
+
+
+def test_walk_official_list_historical_section():
+    """Test that historical species follow a single unnumbered marker."""
+    birds = [
+        _bird("O1", "F1"),
+        _bird("O1", "F1", status="(4)"),
+        _bird("O2", "F2", status="(4)"),
+    ]
+
+    events = list(walk_official_list(birds))
+
+    assert [kind for kind, _, _ in events] == [
+        ORDER,
+        FAMILY,
+        SPECIES,
+        HISTORICAL,
+        SPECIES,
+        ORDER,
+        FAMILY,
+        SPECIES,
+    ]
+    assert [text for kind, text, _ in events if kind == SPECIES] == [
+        "1",
+        "",
+        "",
+    ]
+    assert events[4][2] is birds[1]
+
+
+def test_walk_official_list_empty():
+    """Test that an empty list yields nothing."""
+    assert not list(walk_official_list(iter([])))
@@ -1,8 +1,33 @@
 """ Test parse_common_arguments """
 import argparse
+import logging
+import os
+import tomllib
+from importlib import metadata
 from unittest.mock import patch, mock_open
 import pytest
-from update_state_list.parse_common_arguments import parse_common_arguments
+from packaging.version import Version
+from update_state_list.parse_common_arguments import (
+    configure_logging,
+    get_version,
+    parse_common_arguments,
+)
+
+
+# Bound before the autouse fixture patches metadata.version
+INSTALLED_VERSION = metadata.version
+
+
+@pytest.fixture(autouse=True)
+def not_installed():
+    """Read the version from pyproject.toml as in a source checkout."""
+    get_version.cache_clear()
+    with patch(
+        "update_state_list.parse_common_arguments.metadata.version",
+        side_effect=metadata.PackageNotFoundError,
+    ) as mock_version:
+        yield mock_version
+    get_version.cache_clear()
 
 
 @pytest.fixture
@@ -81,3 +106,61 @@ def test_parse_common_arguments_reads_version():
         parser = parse_common_arguments("test_prog", "Test")
         version_action = next(a for a in parser._actions if a.dest == "version")
         assert "3.2.1" in version_action.version
+
+
+def test_get_version_from_installed_package(not_installed):
+    """Test that the installed package version is used without file I/O."""
+    not_installed.side_effect = None
+    not_installed.return_value = "4.5.6"
+    with patch("builtins.open") as mock_file:
+        assert get_version() == "4.5.6"
+        mock_file.assert_not_called()
+    not_installed.assert_called_once_with("update_state_list")
+
+
+def test_get_version_is_cached(not_installed):
+    """Test that the version is only looked up once."""
+    not_installed.side_effect = None
+    not_installed.return_value = "4.5.6"
+    assert get_version() == "4.5.6"
+    assert get_version() == "4.5.6"
+    not_installed.assert_called_once()
+
+
+def test_parse_common_arguments_does_not_parse():
+    """Test that building the parser does not read the command line."""
+    with patch("sys.argv", ["prog", "--verbose"]), patch(
+        "logging.basicConfig"
+    ) as mock_basic_config:
+        parse_common_arguments("test_prog", "Test")
+        mock_basic_config.assert_not_called()
+
+
+def test_configure_logging_verbose():
+    """Test that --verbose enables info logging."""
+    with patch("logging.basicConfig") as mock_basic_config:
+        configure_logging(argparse.Namespace(verbose=True))
+        mock_basic_config.assert_called_once_with(level=logging.INFO)
+
+
+def test_configure_logging_quiet():
+    """Test that logging is left alone without --verbose."""
+    with patch("logging.basicConfig") as mock_basic_config:
+        configure_logging(argparse.Namespace(verbose=False))
+        mock_basic_config.assert_not_called()
+
+
+def test_declared_version_matches_installed():
+    """Test that pyproject.toml declares the same version as the package
+    metadata. The metadata stores it normalised, so "0.00" is installed
+    as "0.0"; the two are compared as versions, not strings."""
+    pyproject = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "pyproject.toml"
+    )
+    with open(pyproject, "rb") as f:
+        declared = tomllib.load(f)["tool"]["poetry"]["version"]
+    try:
+        installed = INSTALLED_VERSION("update_state_list")
+    except metadata.PackageNotFoundError:
+        pytest.skip("update_state_list is not installed")
+    assert Version(declared) == Version(installed)
@@ -3,16 +3,23 @@
 import csv
 import logging
 import math
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 import pytest
 
+from update_state_list.official_list import SPECIES, walk_official_list
 from update_state_list.update_state_list import (
+    apply_taxonomy,
     create_output_file,
+    get_first_taxon_with_prefix,
+    get_longest_prefix_taxon,
     get_matching_taxon,
+    get_search_name,
     get_taxonomy_of_interest,
+    index_taxonomy,
     main,
     read_input_file,
+    sort_taxonomy_names,
     update_state_list,
 )
 
@@ -82,6 +89,71 @@ class TestCreateOutputFile:
             assert rows[0]["comName"] == "Bird A"
             assert rows[1]["comName"] == "Bird B"
 
+    def test_create_output_file_historical_last(self, tmp_path):
+        """Test that historical birds sort after all other birds."""
+        input_file = tmp_path / "test.csv"
+        updated_data = [
+            {"comName": "Bird A", "taxonOrder": 100, "State Status": "(4)"},
+            {"comName": "Bird B", "taxonOrder": "200", "State Status": ""},
+            {"comName": "Bird C", "taxonOrder": 150.01},
+        ]
+
+        create_output_file(updated_data, str(input_file))
+
+        output_file = tmp_path / "test_updated.csv"
+        with open(output_file, "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+            assert [row["comName"] for row in rows] == [
+                "Bird C",
+                "Bird B",
+                "Bird A",
+            ]
+            assert rows[1]["taxonOrder"] == "200"
+
+    def test_create_output_file_accepts_iterator(self, tmp_path):
+        """Test that birds can be streamed in and are not re-ordered."""
+        input_file = tmp_path / "test.csv"
+        updated_data = [
+            {"comName": "Bird B", "taxonOrder": 200},
+            {"comName": "Bird A", "taxonOrder": 100},
+        ]
+
+        create_output_file(iter(updated_data), str(input_file))
+
+        output_file = tmp_path / "test_updated.csv"
+        with open(output_file, "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+            assert [row["comName"] for row in rows] == ["Bird A", "Bird B"]
+        assert updated_data[0]["comName"] == "Bird B"
+
+    def test_create_output_file_sorts_list_in_place(self, tmp_path):
+        """Test that a list of birds is sorted in place."""
+        input_file = tmp_path / "test.csv"
+        updated_data = [
+            {"comName": "Bird B", "taxonOrder": 200},
+            {"comName": "Bird A", "taxonOrder": 100},
+        ]
+
+        create_output_file(updated_data, str(input_file))
+
+        assert [bird["comName"] for bird in updated_data] == [
+            "Bird A",
+            "Bird B",
+        ]
+
+    def test_create_output_file_missing_fields_empty(self, tmp_path):
+        """Test that fields missing from a bird are written empty."""
+        input_file = tmp_path / "test.csv"
+        updated_data = [{"comName": "Bird A", "taxonOrder": 1.5}]
+
+        create_output_file(updated_data, str(input_file))
+
+        output_file = tmp_path / "test_updated.csv"
+        with open(output_file, "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+            assert rows[0]["taxonOrder"] == "1.5"
+            assert rows[0]["Sort as"] == ""
+
 
 class TestGetTaxonomyOfInterest:
     """Tests for get_taxonomy_of_interest function."""
@@ -112,6 +184,52 @@ class TestGetTaxonomyOfInterest:
         assert len(result) == 1
         assert result[0]["comName"] == "Wild Bird"
 
+    @patch("update_state_list.update_state_list.get_taxonomy")
+    def test_keeps_only_taxon_fields(self, mock_get_taxonomy):
+        """Test that taxa are trimmed to the fields used for the list."""
+        mock_get_taxonomy.ebird_taxonomy.return_value = [
+            {
+                "comName": "American Robin",
+                "category": "species",
+                "bandingCodes": ["AMRO"],
+                "taxonOrder": 100,
+            },
+        ]
+
+        result = get_taxonomy_of_interest("fake_api_key")
+
+        assert "bandingCodes" not in result[0]
+        assert result[0]["taxonOrder"] == 100
+        assert result[0]["sciName"] is None
+
+    @patch("update_state_list.update_state_list.get_taxonomy")
+    def test_filters_spuh_and_slash(self, mock_get_taxonomy):
+        """Test that spuhs and slashes are filtered out."""
+        mock_get_taxonomy.ebird_taxonomy.return_value = [
+            {"comName": "Snow Goose", "category": "species"},
+            {"comName": "goose sp.", "category": "spuh"},
+            {"comName": "Snow/Ross's Goose", "category": "slash"},
+            {"comName": "Snow Goose (Lesser)", "category": "issf"},
+        ]
+
+        result = get_taxonomy_of_interest("fake_api_key")
+
+        assert [t["comName"] for t in result] == [
+            "Snow Goose",
+            "Snow Goose (Lesser)",
+        ]
+
+    @patch("update_state_list.update_state_list.get_taxonomy")
+    def test_requests_categories_of_interest(self, mock_get_taxonomy):
+        """Test that only the categories of interest are requested."""
+        mock_get_taxonomy.ebird_taxonomy.return_value = []
+
+        get_taxonomy_of_interest("fake_api_key")
+
+        mock_get_taxonomy.ebird_taxonomy.assert_called_once_with(
+            "fake_api_key", category="species,issf,form,intergrade"
+        )
+
 
 class TestReadInputFile:
     """Tests for read_input_file function."""
@@ -131,12 +249,291 @@ class TestReadInputFile:
         assert len(result) == 1
         assert result[0]["comName"] == "American Robin"
 
+    def test_read_short_rows_and_blank_lines(self, tmp_path):
+        """Test that short rows omit trailing fields and blank lines skip."""
+        test_file = tmp_path / "birds.csv"
+        test_file.write_text(
+            "comName,State Status,Sort as\nBrant,\n\nBarnacle Goose,Rare\n",
+            encoding="utf-8",
+        )
+
+        result = read_input_file(str(test_file))
+
+        assert len(result) == 2
+        assert result[0] == {"comName": "Brant", "State Status": ""}
+        assert result[1].get("Sort as") is None
+
     def test_read_nonexistent_file(self):
         """Test that FileNotFoundError is raised for nonexistent file."""
         with pytest.raises(FileNotFoundError):
             read_input_file("nonexistent.csv")
 
 
+class TestIndexTaxonomy:
+    """Tests for index_taxonomy function."""
+
+    def test_index_by_common_name(self):
+        """Test that taxa are indexed by common name."""
+        taxonomy = [
+            {"comName": "American Robin", "sciName": "Turdus migratorius"}
+        ]
+
+        result = index_taxonomy(taxonomy)
+
+        assert result["American Robin"]["sciName"] == "Turdus migratorius"
+
+    def test_keeps_first_duplicate(self):
+        """Test that the first taxon wins when common names repeat."""
+        taxonomy = [
+            {"comName": "Bird", "taxonOrder": 1},
+            {"comName": "Bird", "taxonOrder": 2},
+        ]
+
+        result = index_taxonomy(taxonomy)
+
+        assert result["Bird"]["taxonOrder"] == 1
+
+
+class TestGetLongestPrefixTaxon:
+    """Tests for get_longest_prefix_taxon function."""
+
+    def test_longest_prefix_wins(self):
+        """Test that the longest leading words naming a taxon are used."""
+        taxonomy_by_name = index_taxonomy(
+            [{"comName": "Snow"}, {"comName": "Snow Goose"}]
+        )
+
+        result = get_longest_prefix_taxon(
+            "Snow Goose (Lesser)", taxonomy_by_name
+        )
+
+        assert result["comName"] == "Snow Goose"
+
+    def test_words_inside_parenthetical(self):
+        """Test that words inside the parenthetical are dropped one by one."""
+        taxonomy_by_name = index_taxonomy(
+            [
+                {"comName": "Yellow-rumped Warbler"},
+                {"comName": "Yellow-rumped Warbler (Myrtle"},
+            ]
+        )
+
+        result = get_longest_prefix_taxon(
+            "Yellow-rumped Warbler (Myrtle x Audubon)", taxonomy_by_name
+        )
+
+        assert result["comName"] == "Yellow-rumped Warbler (Myrtle"
+
+    def test_prefix_without_parenthetical(self):
+        """Test that a name without a parenthetical is not shortened."""
+        taxonomy_by_name = index_taxonomy([{"comName": "Willet"}])
+
+        assert (
+            get_longest_prefix_taxon("Willet Eastern", taxonomy_by_name)
+            is None
+        )
+
+    def test_words_after_parenthetical_only(self):
+        """Test that the words before the parenthetical are never dropped."""
+        taxonomy_by_name = index_taxonomy([{"comName": "Snow"}])
+
+        assert (
+            get_longest_prefix_taxon("Snow Goose (Lesser)", taxonomy_by_name)
+            is None
+        )
+
+    def test_no_prefix(self):
+        """Test that None is returned when no leading words match."""
+        taxonomy_by_name = index_taxonomy([{"comName": "Willet"}])
+
+        assert get_longest_prefix_taxon("Brant", taxonomy_by_name) is None
+
+
+class TestApplyTaxonomy:
+    """Tests for apply_taxonomy function."""
+
+    def test_forms_and_intergrades_are_not_numbered(self, tmp_path):
+        """Test that form and intergrade taxa are written as subspecies and
+        so get no number on the official list."""
+        # Names without a parenthetical, so only the category decides
+        taxonomy_by_name = index_taxonomy(
+            {
+                "comName": name,
+                "taxonOrder": taxon_order,
+                "category": category,
+                "order": "Anseriformes",
+                "familyComName": "Ducks, Geese, and Waterfowl",
+            }
+            for taxon_order, (name, category) in enumerate(
+                [
+                    ("Snow Goose", "species"),
+                    ("Blue Goose", "form"),
+                    ("Snow x Ross's Goose", "intergrade"),
+                    ("Ross's Goose", "species"),
+                ],
+                start=1,
+            )
+        )
+        birds_data = [
+            {"comName": name, "State Status": ""}
+            for name in taxonomy_by_name
+        ]
+
+        updated = apply_taxonomy(birds_data, taxonomy_by_name)
+        assert [bird["subspecies"] for bird in updated] == [
+            False,
+            True,
+            True,
+            False,
+        ]
+
+        input_file = tmp_path / "list.csv"
+        create_output_file(updated, str(input_file))
+        with open(
+            tmp_path / "list_updated.csv", encoding="utf-8", newline=""
+        ) as f:
+            numbers = [
+                text
+                for kind, text, _ in walk_official_list(csv.DictReader(f))
+                if kind == SPECIES
+            ]
+        assert numbers == ["1", "", "", "2"]
+
+    def test_apply_taxonomy(self):
+        """Test that matched birds are updated and unmatched ones dropped."""
+        taxonomy_by_name = index_taxonomy(
+            [
+                {
+                    "comName": "Snow Goose",
+                    "taxonOrder": 10,
+                    "category": "species",
+                }
+            ]
+        )
+        birds_data = [
+            {"comName": "Snow Goose"},
+            {"comName": "Snow Goose (Lesser)"},
+            {"comName": "Nonexistent Bird"},
+        ]
+
+        result = apply_taxonomy(birds_data, taxonomy_by_name)
+
+        assert [bird["comName"] for bird in result] == [
+            "Snow Goose",
+            "Snow Goose (Lesser)",
+        ]
+        assert result[0]["subspecies"] is False
+        assert math.isclose(result[1]["taxonOrder"], 10.01)
+
+    @patch(
+        "update_state_list.update_state_list.sort_taxonomy_names",
+        wraps=sort_taxonomy_names,
+    )
+    def test_apply_taxonomy_sorts_names_lazily(self, mock_sort):
+        """Test that the names are only sorted for a prefix search."""
+        taxonomy_by_name = index_taxonomy(
+            [
+                {"comName": "Brant", "taxonOrder": 1, "category": "species"},
+                {"comName": "Snow Goose", "taxonOrder": 2},
+            ]
+        )
+
+        apply_taxonomy([{"comName": "Brant"}], taxonomy_by_name)
+        mock_sort.assert_not_called()
+
+        result = apply_taxonomy(
+            [{"comName": "Snow (Lesser)"}, {"comName": "Snow (Greater)"}],
+            taxonomy_by_name,
+        )
+        mock_sort.assert_called_once_with(taxonomy_by_name)
+        assert math.isclose(result[1]["taxonOrder"], 2.02)
+
+    def test_apply_taxonomy_streamed_rows(self):
+        """Test that the rows can be a one-shot iterator."""
+        taxonomy_by_name = index_taxonomy(
+            [{"comName": "Willet", "taxonOrder": 1, "category": "species"}]
+        )
+        birds_data = iter([{"comName": "Willet"}, {"comName": "Willet (x)"}])
+
+        result = apply_taxonomy(birds_data, taxonomy_by_name)
+
+        assert [bird["comName"] for bird in result] == [
+            "Willet",
+            "Willet (x)",
+        ]
+        assert math.isclose(result[1]["taxonOrder"], 1.01)
+
+    def test_apply_taxonomy_long_subspecies_run(self):
+        """Test that offsets along a long run of subspecies do not drift."""
+        taxonomy_by_name = index_taxonomy(
+            [{"comName": "Willet", "taxonOrder": 1, "category": "species"}]
+        )
+        birds_data = [{"comName": f"Willet ({i})"} for i in range(1, 15)]
+
+        result = apply_taxonomy(birds_data, taxonomy_by_name)
+
+        assert [bird["taxonOrder"] for bird in result] == [
+            1 + i * 0.01 for i in range(1, 15)
+        ]
+
+
+class TestGetSearchName:
+    """Tests for get_search_name function."""
+
+    def test_sort_as_preferred(self):
+        """Test that 'Sort as' is used when present."""
+        bird = {"comName": "Fea's Petrel", "Sort as": "Desertas Petrel"}
+
+        assert get_search_name(bird) == "Desertas Petrel"
+
+    def test_common_name_when_sort_as_blank(self):
+        """Test that the common name is used when 'Sort as' is blank."""
+        bird = {"comName": "Brant", "Sort as": ""}
+
+        assert get_search_name(bird) == "Brant"
+
+
+class TestGetFirstTaxonWithPrefix:
+    """Tests for sort_taxonomy_names and get_first_taxon_with_prefix."""
+
+    def test_first_in_taxonomic_order(self):
+        """Test that the earliest taxon in the taxonomy wins, not the
+        alphabetically first name."""
+        taxonomy_by_name = index_taxonomy(
+            [
+                {"comName": "Snow Goose (Lesser)"},
+                {"comName": "Sora"},
+                {"comName": "Snow Bunting"},
+                {"comName": "Snow Goose"},
+            ]
+        )
+        sorted_names = sort_taxonomy_names(taxonomy_by_name)
+
+        assert sorted_names[0] == ("Snow Bunting", 2)
+        result = get_first_taxon_with_prefix(
+            "Snow", taxonomy_by_name, sorted_names
+        )
+        assert result["comName"] == "Snow Goose (Lesser)"
+        result = get_first_taxon_with_prefix(
+            "Snow B", taxonomy_by_name, sorted_names
+        )
+        assert result["comName"] == "Snow Bunting"
+
+    def test_no_match(self):
+        """Test that None is returned when no name has the prefix."""
+        taxonomy_by_name = index_taxonomy([{"comName": "Sora"}])
+        sorted_names = sort_taxonomy_names(taxonomy_by_name)
+
+        assert (
+            get_first_taxon_with_prefix("Z", taxonomy_by_name, sorted_names)
+            is None
+        )
+        assert (
+            get_first_taxon_with_prefix("Sorax", taxonomy_by_name, sorted_names)
+            is None
+        )
+
+
 class TestGetMatchingTaxon:
     """Tests for get_matching_taxon function."""
 
@@ -146,7 +543,9 @@ class TestGetMatchingTaxon:
             {"comName": "American Robin", "sciName": "Turdus migratorius"}
         ]
 
-        result, is_subspecies = get_matching_taxon("American Robin", taxonomy)
+        result, is_subspecies = get_matching_taxon(
+            "American Robin", index_taxonomy(taxonomy)
+        )
 
         assert result["comName"] == "American Robin"
         assert is_subspecies is False
@@ -161,24 +560,61 @@ class TestGetMatchingTaxon:
         ]
 
         result, is_subspecies = get_matching_taxon(
-            "Yellow-rumped Warbler (Myrtle)", taxonomy
+            "Yellow-rumped Warbler (Myrtle)", index_taxonomy(taxonomy)
         )
 
         assert result["comName"] == "Yellow-rumped Warbler"
         assert is_subspecies is True
 
+    def test_base_name_match_with_apostrophe(self):
+        """Test that the base name keeps apostrophes in the common name."""
+        taxonomy = [
+            {"comName": "Wilson's Storm-Petrel"},
+            {"comName": "Wilson's Warbler"},
+        ]
+
+        result, is_subspecies = get_matching_taxon(
+            "Wilson's Warbler (pileolata)", index_taxonomy(taxonomy)
+        )
+
+        assert result["comName"] == "Wilson's Warbler"
+        assert is_subspecies is True
+
+    def test_base_name_prefix_without_space(self):
+        """Test the base name ends at a parenthetical not preceded by space."""
+        taxonomy = [{"comName": "Snow Goose (white morph)"}]
+
+        result, is_subspecies = get_matching_taxon(
+            "Snow Goose(Lesser)", index_taxonomy(taxonomy)
+        )
+
+        assert result["comName"] == "Snow Goose (white morph)"
+        assert is_subspecies is True
+
+    def test_trailing_word_is_not_a_subspecies(self):
+        """Test that a name is not matched by dropping a plain trailing word."""
+        taxonomy = [{"comName": "Willet", "sciName": "Tringa semipalmata"}]
+
+        result, is_subspecies = get_matching_taxon(
+            "Willet Eastern", index_taxonomy(taxonomy)
+        )
+
+        assert result is None
+        assert is_subspecies is True
+
     def test_no_match_found(self):
         """Test when no match is found."""
         taxonomy = [
             {"comName": "American Robin", "sciName": "Turdus migratorius"}
         ]
 
-        result, is_subspecies = get_matching_taxon("Nonexistent Bird", taxonomy)
+        result, is_subspecies = get_matching_taxon(
+            "Nonexistent Bird", index_taxonomy(taxonomy)
+        )
 
         assert result is None
         assert is_subspecies is True
 
-
     @patch("update_state_list.update_state_list.create_output_file")
     @patch("update_state_list.update_state_list.read_input_file")
     @patch("update_state_list.update_state_list.get_taxonomy_of_interest")
@@ -239,6 +675,8 @@ class TestGetMatchingTaxon:
 
         updated_data = mock_create.call_args[0][0]
         assert updated_data[0]["subspecies"] is True
+
+
 class TestMain:
     """Tests for main function."""
 
@@ -259,6 +697,8 @@ class TestMain:
             main()
 
         assert exc_info.value.code != 0
+
+
 class TestUpdateStateList:
     """Tests for update_state_list function."""
 
@@ -468,4 +908,72 @@ class TestUpdateStateList:
         assert updated_data[0]["familyComName"] == "Thrushes"
         assert updated_data[0]["taxonOrder"] == 100
 
+    @patch("update_state_list.update_state_list.create_output_file")
+    @patch("update_state_list.update_state_list.read_input_file")
+    @patch("update_state_list.update_state_list.get_taxonomy_of_interest")
+    @patch("update_state_list.update_state_list.get_ebird_api_key")
+    @patch("update_state_list.update_state_list.get_matching_taxon")
+    def test_update_state_list_matches_repeated_name_once(
+        self, mock_match, mock_api_key, mock_taxonomy, mock_read, mock_create
+    ):
+        """Test that a name repeated in the list is only matched once."""
+        mock_api_key.get_ebird_api_key.return_value = "fake_key"
+        mock_taxonomy.return_value = []
+        mock_match.return_value = ({"taxonOrder": 100}, False)
+        mock_read.return_value = [
+            {"comName": "American Robin"},
+            {"comName": "American Robin"},
+        ]
+
+        update_state_list("test.csv")
+
+        mock_match.assert_called_once_with(
+            "American Robin", taxonomy_by_name={}, get_sorted_names=ANY
+        )
+        assert len(mock_create.call_args[0][0]) == 2
 
+    @patch("update_state_list.update_state_list.create_output_file")
+    @patch("update_state_list.update_state_list.read_input_file")
+    @patch("update_state_list.update_state_list.get_taxonomy_of_interest")
+    @patch("update_state_list.update_state_list.get_ebird_api_key")
+    def test_update_state_list_read_error_skips_fetch(
+        self, mock_api_key, mock_taxonomy, mock_read, mock_create
+    ):
+        """Test that a read error is raised before the taxonomy is fetched."""
+        mock_api_key.get_ebird_api_key.return_value = "fake_key"
+        mock_read.side_effect = FileNotFoundError("test.csv")
+
+        with pytest.raises(FileNotFoundError):
+            update_state_list("test.csv")
+
+        mock_taxonomy.assert_not_called()
+        mock_create.assert_not_called()
+
+    @patch("update_state_list.update_state_list.create_output_file")
+    @patch("update_state_list.update_state_list.read_input_file")
+    @patch("update_state_list.update_state_list.get_taxonomy_of_interest")
+    @patch("update_state_list.update_state_list.get_ebird_api_key")
+    def test_update_state_list_with_intergrade(
+        self, mock_api_key, mock_taxonomy, mock_read, mock_create
+    ):
+        """Test that exactly matched intergrades are treated as subspecies."""
+        mock_api_key.get_ebird_api_key.return_value = "fake_key"
+        mock_taxonomy.return_value = [
+            {
+                "comName": "Northern Flicker (Yellow-shafted x Red-shafted)",
+                "taxonOrder": 300,
+                "category": "intergrade",
+            }
+        ]
+        mock_read.return_value = [
+            {
+                "comName": "Flicker",
+                "Sort as": "Northern Flicker (Yellow-shafted x Red-shafted)",
+            }
+        ]
+
+        update_state_list("test.csv")
+
+        updated_data = mock_create.call_args[0][0]
+        assert updated_data[0]["subspecies"] is True
+        assert updated_data[0]["taxonOrder"] == 300
@@ -5,54 +5,120 @@ plumages.
 
 import csv
 import logging
+from xml.sax.saxutils import escape
 
 from docx import Document, opc
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-from docx.oxml.shared import OxmlElement
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.shared import Inches
 
-from update_state_list import parse_common_arguments
+from update_state_list import official_list, parse_common_arguments
+
+# Only the species code varies between the links of each species, so the
+# rest of each URL is kept as a constant prefix and suffix.
+SPECIES_URL_PREFIX = "https://ebird.org/species/"
+SPECIES_URL_SUFFIX = "/US-VA"
+MAP_URL_PREFIX = "http://ebird.org/ebird/map/"
+MAP_URL_SUFFIX = (
+    "?neg=true&env.minX=-84.70&env.minY=36.20&env.maxX=-70.95&env.maxY=37.22"
+    "&zh=true&gp=true&ev=Z&mr=1-12&bmo=1&emo=12&yr=all&getLocations=states"
+    "&states=US-VA"
+)
+CHART_URL_PREFIX = (
+    "http://ebird.org/ebird/GuideMe?cmd=decisionPage&speciesCodes="
+)
+CHART_URL_SUFFIX = (
+    "&getLocations=states&states=US-VA&bYear=1900&eYear=Cur&bMonth=1"
+    "&eMonth=12&reportType=species&parentState=US-VA"
+)
+
+
+def hyperlink_rid_cache(part) -> dict:
+    """
+    Create a cache of the hyperlink relationships of a document part.
+
+    Args:
+        part: The document part the hyperlinks belong to.
+
+    Returns:
+        dict: The rId of each external hyperlink of the part, keyed by URL.
+    """
+    return {
+        rel.target_ref: r_id
+        for r_id, rel in part.rels.items()
+        if rel.is_external
+        and rel.reltype == opc.constants.RELATIONSHIP_TYPE.HYPERLINK
+    }
+
 
-def add_hyperlink(paragraph, url, text, color, underline):
+def relate_hyperlink(part, url, rid_cache) -> str:
+    """
+    Get the rId of the hyperlink relationship to a URL, adding it if needed.
+
+    python-docx's part.relate_to scans every relationship of the part to find
+    an existing one and again to pick the next rId, which is quadratic over a
+    document with thousands of links. The cache answers the first question
+    with a dictionary lookup, so a new relationship can be added directly.
+
+    Args:
+        part: The document part the hyperlink belongs to.
+        url (str): The URL that the hyperlink should point to.
+        rid_cache (dict): Cache created by hyperlink_rid_cache for the part.
+
+    Returns:
+        str: The rId of the relationship.
+    """
+    r_id = rid_cache.get(url)
+    if r_id is None:
+        rels = part.rels
+        next_id = len(rels) + 1
+        while f"rId{next_id}" in rels:
+            next_id += 1
+        r_id = f"rId{next_id}"
+        rels.add_relationship(
+            opc.constants.RELATIONSHIP_TYPE.HYPERLINK,
+            url,
+            r_id,
+            is_external=True,
+        )
+        rid_cache[url] = r_id
+    return r_id
+
+
+def add_hyperlink(
+    paragraph, url, text, color, underline, rid_cache=None, part=None
+):
     """
     Add a hyperlink to a paragraph in a Word document.
 
+    The hyperlink is parsed from the same WordprocessingML as the links of the
+    generated table rather than built one element at a time.
+
     Args:
         paragraph: The paragraph object to add the hyperlink to.
         url (str): The URL that the hyperlink should point to.
         text (str): The display text for the hyperlink.
         color (str, optional): The color of the hyperlink text
         underline (bool): Whether the hyperlink should be underlined.
+        rid_cache (dict, optional): Cache created by hyperlink_rid_cache for
+            the paragraph's part. Pass it when adding many hyperlinks.
+        part (optional): The document part of the paragraph. Passing it
+            saves looking it up through the paragraph's parents.
 
     Returns:
         OxmlElement: The hyperlink XML element that was created and added to
         the paragraph.
     """
-    part = paragraph.part
-    r_id = part.relate_to(
-        url, opc.constants.RELATIONSHIP_TYPE.HYPERLINK, is_external=True
-    )
-
-    hyperlink = OxmlElement("w:hyperlink")
-    hyperlink.set(qn("r:id"), r_id)
-
-    new_run = OxmlElement("w:r")
-    rpr = OxmlElement("w:rPr")
-
-    if color:
-        c = OxmlElement("w:color")
-        c.set(qn("w:val"), color)
-        rpr.append(c)
-
-    if not underline:
-        u = OxmlElement("w:u")
-        u.set(qn("w:val"), "none")
-        rpr.append(u)
-
-    new_run.append(rpr)
-    new_run.text = text
-    hyperlink.append(new_run)
+    if part is None:
+        part = paragraph.part
+    if rid_cache is None:
+        rid_cache = hyperlink_rid_cache(part)
+    r_id = relate_hyperlink(part, url, rid_cache)
+    hyperlink = parse_xml(
+        f'<w:p {nsdecls("w", "r")}>'
+        f"{_hyperlink_xml(r_id, text, color, underline)}</w:p>"
+    )[0]
     # pylint: disable=W0212
     paragraph._p.append(hyperlink)
 
@@ -64,13 +130,12 @@ def generate_docx(official_list_file) -> None:
     Generate a formatted Word document from a CSV file containing official bird
     species data.
 
+    The table rows are built as WordprocessingML text and parsed once, which
+    is much faster than adding each row and cell through python-docx.
+
     Args:
         official_list_file: Path to the CSV file containing bird species data.
     """
-    # Read CSV data
-    with open(official_list_file, "r", encoding="utf-8") as f:
-        birds_data = list(csv.DictReader(f))
-
     # Initialize document
     doc = Document()
     title = doc.add_heading(
@@ -79,7 +144,7 @@ def generate_docx(official_list_file) -> None:
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
     # Create table
-    table = doc.add_table(rows=1, cols=6)
+    table = doc.add_table(rows=0, cols=6)
     table.style = "Light Grid Accent 1"
 
     # Set headers
@@ -93,79 +158,82 @@ def generate_docx(official_list_file) -> None:
     ]
     widths = [0.5, 1.1, 1.1, 1.1, 1.1, 1.1]
 
-    for i, (header, width) in enumerate(zip(headers, widths)):
-        table.columns[i].width = Inches(width)
-        cell = table.rows[0].cells[i]
-        cell.text = header
-        cell.paragraphs[0].runs[0].bold = True
-
-    # Add data rows
-    current_order = current_family = ""
-    index = 1
-    historically_occurring_section = False
-    for bird in birds_data:
-        # Add historical species row if first occurrence
-        state_status = bird.get("State Status", "")
-        if state_status == "(4)" and not historically_occurring_section:
-            _add_category_row(
-                table,
-                "Species Believed to Have Occurred Historically",
-                "FFFFE0",
-            )
-            historically_occurring_section = True
-        # Add order row if changed
-        if bird.get("order", "") != current_order:
-            current_order = bird["order"]
-            current_family = ""
-            _add_category_row(table, f"Order: {current_order}", "D3D3D3")
-
-        # Add family row if changed
-        if bird.get("familyComName", "") != current_family:
-            current_family = bird["familyComName"]
-            _add_category_row(table, f"Family: {current_family}", "ADD8E6")
-
-        # Add species row
-        row_cells = table.add_row().cells
-        species_code = bird.get("speciesCode", "")
-
-        if (
-            bird.get("subspecies", "False").lower() == "false"
-            and not historically_occurring_section
-        ):
-            row_cells[0].text = str(index)
-            index += 1
-
-        add_hyperlink(
-            row_cells[1].paragraphs[0],
-            f"https://ebird.org/species/{species_code}/US-VA",
-            bird.get("comName"),
-            "0000FF",
-            False,
-        )
+    column_widths = [Inches(width) for width in widths]
+    # Set the grid directly rather than through table.columns, which builds
+    # a column object per access
+    # pylint: disable=W0212
+    for grid_col, width in zip(table._tbl.tblGrid.gridCol_lst, column_widths):
+        grid_col.w = width
+    cell_widths = [width.twips for width in column_widths]
 
-        row_cells[2].text = bird.get("sciName", "")
-        row_cells[3].text = state_status
-
-        add_hyperlink(
-            row_cells[4].paragraphs[0],
-            f"http://ebird.org/ebird/map/{species_code}?neg=true&env.minX="
-            "-84.70&env.minY=36.20&env.maxX=-70.95&env.maxY=37.22&zh=true&"
-            "gp=true&ev=Z&mr=1-12&bmo=1&emo=12&yr=all&getLocations=states&"
-            "states=US-VA",
-            "Map",
-            "0000FF",
-            False,
-        )
+    part = doc.part
+    rid_cache = hyperlink_rid_cache(part)
+
+    def relate_to(url):
+        return relate_hyperlink(part, url, rid_cache)
 
-        add_hyperlink(
-            row_cells[5].paragraphs[0],
-            f"http://ebird.org/ebird/GuideMe?cmd=decisionPage&speciesCodes="
-            f"{species_code}&getLocations=states&states=US-VA&bYear=1900&eYear="
-            "Cur&bMonth=1&eMonth=12&reportType=species&parentState=US-VA",
-            "Chart",
-            "0000FF",
-            False,
+    # Add data rows, streaming the CSV rather than reading it all up front
+    rows = [
+        _row_xml(
+            [_text_xml(header, bold=True) for header in headers], cell_widths
         )
+    ]
+    with open(official_list_file, "r", encoding="utf-8", newline="") as f:
+        for kind, text, bird in official_list.walk_official_list(
+            csv.DictReader(f)
+        ):
+            if kind == official_list.HISTORICAL:
+                rows.append(
+                    _category_row_xml(
+                        "Species Believed to Have Occurred Historically",
+                        "FFFFE0",
+                        cell_widths,
+                    )
+                )
+                continue
+            if kind == official_list.ORDER:
+                rows.append(
+                    _category_row_xml(f"Order: {text}", "D3D3D3", cell_widths)
+                )
+                continue
+            if kind == official_list.FAMILY:
+                rows.append(
+                    _category_row_xml(f"Family: {text}", "ADD8E6", cell_widths)
+                )
+                continue
+
+            species_code = bird.get("speciesCode", "")
+            cells = [
+                _text_xml(text),
+                _hyperlink_xml(
+                    relate_to(
+                        SPECIES_URL_PREFIX + species_code + SPECIES_URL_SUFFIX
+                    ),
+                    bird.get("comName") or "",
+                    "0000FF",
+                ),
+                _text_xml(bird.get("sciName", "")),
+                _text_xml(bird.get("State Status", "")),
+                _hyperlink_xml(
+                    relate_to(MAP_URL_PREFIX + species_code + MAP_URL_SUFFIX),
+                    "Map",
+                    "0000FF",
+                ),
+                _hyperlink_xml(
+                    relate_to(
+                        CHART_URL_PREFIX + species_code + CHART_URL_SUFFIX
+                    ),
+                    "Chart",
+                    "0000FF",
+                ),
+            ]
+            rows.append(_row_xml(cells, cell_widths))
+
+    # Parse all rows at once and move them into the table
+    # pylint: disable=W0212
+    table._tbl.extend(
+        parse_xml(f'<w:tbl {nsdecls("w", "r")}>{"".join(rows)}</w:tbl>')
+    )
 
     # Save document
     output_file = official_list_file.replace(".csv", ".docx")
@@ -173,23 +241,53 @@ def generate_docx(official_list_file) -> None:
     logging.info("Document saved as %s", output_file)
 
 
-def _add_category_row(table, text, color):
-    """Add a category row (order/family) to the table."""
-    row_cells = table.add_row().cells
-    merged_cell = row_cells[0].merge(row_cells[5])
-    merged_cell.text = text
-    merged_cell.paragraphs[0].runs[0].bold = True
-    shading_elm = OxmlElement("w:shd")
-    shading_elm.set(qn("w:fill"), color)
-    # pylint: disable=W0212
-    merged_cell._element.get_or_add_tcPr().append(shading_elm)
+def _row_xml(cells, cell_widths):
+    """Return a table row with one paragraph of content per cell."""
+    return (
+        "<w:tr>"
+        + "".join(
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+            f"<w:p>{content}</w:p></w:tc>"
+            for width, content in zip(cell_widths, cells)
+        )
+        + "</w:tr>"
+    )
+
+
+def _text_xml(text, bold=False):
+    """Return the WordprocessingML run for plain text, if there is any."""
+    if not text:
+        return ""
+    rpr = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    return f'<w:r>{rpr}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _hyperlink_xml(r_id, text, color, underline=False):
+    """Return the WordprocessingML for a hyperlink, underlined only if asked."""
+    rpr = f'<w:color w:val="{color}"/>' if color else ""
+    if not underline:
+        rpr += '<w:u w:val="none"/>'
+    return (
+        f'<w:hyperlink r:id="{escape(str(r_id))}"><w:r><w:rPr>{rpr}</w:rPr>'
+        f'<w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:hyperlink>'
+    )
+
+
+def _category_row_xml(text, color, cell_widths):
+    """Return a bold, shaded table row (order/family) spanning all columns."""
+    return (
+        f'<w:tr><w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{sum(cell_widths)}"/>'
+        f'<w:gridSpan w:val="{len(cell_widths)}"/><w:shd w:fill="{color}"/>'
+        f"</w:tcPr><w:p><w:r><w:rPr><w:b/></w:rPr><w:t>{escape(text)}</w:t>"
+        "</w:r></w:p></w:tc></w:tr>"
+    )
 
 
 def main():
     """
     Main function for the generate_docx application.
     This function sets up command-line argument parsing for the update-state-list program.
-    It reads the version from pyproject.toml, configures logging based on verbosity,
+    It takes the version from the package metadata, configures logging based on verbosity,
     and processes the official list CSV file to generate a DOCX document.
     Args:
         None (uses command-line arguments via argparse)
@@ -201,8 +299,7 @@ def main():
     Returns:
         None
     Raises:
-        FileNotFoundError: If pyproject.toml or the specified CSV file cannot be found
-        tomllib.TOMLDecodeError: If pyproject.toml contains invalid TOML syntax
+        FileNotFoundError: If the specified CSV file cannot be found
     """
     arg_parser = parse_common_arguments.parse_common_arguments(
         program_name="generate-docx",
@@ -214,6 +311,7 @@ def main():
         help="csv of official list created by update_state_list",
     )
     args = arg_parser.parse_args()
+    parse_common_arguments.configure_logging(args)
     generate_docx(args.official_list_csv)
 
 
@@ -4,13 +4,64 @@ plumages.
 """
 
 import csv
+import io
 import logging
 from datetime import date
 
-from update_state_list import parse_common_arguments
+from update_state_list import official_list, parse_common_arguments
 
 TR_START = "<tr>\n"
 TR_END = "</tr>\n"
+# Single pass replacement of the characters that are special in HTML text and
+# attribute values.
+HTML_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+TABLE_START_TEMPLATE = (
+    "<!-- This table was generated on {today} programmatically by https://github.com/gbabineau/UpdateStateList -->"
+    '<table style="width:100%">\n'
+    '<table border="3">\n'
+    + TR_START
+    + '  <td style="width:2%" align="center"><font size="5">#</font></td>\n'
+    '  <td style="width:25%" align="center"><font size="5">Species</font></td>\n'
+    '  <td style="width:22%" align="center"><font size="5">Scientific Name</font></td>\n'
+    '  <td style="width:12%" align="center"><font size="5">State Status</font></td>\n'
+    '  <td style="width:19%" align="center"><font size="5">Spatial Distribution</font></td>\n'
+    '  <td style="width:20%" align="center"><font size="5">Counts & Seasonality</font></td>\n'
+    + TR_END
+)
+TABLE_END = "</table>\n"
+HEADER_TEMPLATE = (
+    TR_START
+    + '  <td colspan=6 bgcolor="{color}"><font size="{font_size}">'
+    "&nbsp&nbsp{level} {text}</font></td>"
+    + TR_END
+)
+HISTORICAL_ROW = '<tr><td align="center" colspan=6><font size="5">Species Believed to Have Occurred Historically</font></td></tr>\n'
+ROW_TEMPLATE = (
+    TR_START
+    + '  <td align="center">{index_text}</font></td>\n'
+    '  <td align="center"><a href="https://ebird.org/species/{species_code}/US-VA" target="_blank">{common_name}</a></td>\n'
+    '  <td align="left">&nbsp&nbsp<i>{scientific_name}</font></td>\n'
+    '  <td align="center">{state_status}</font></td>\n'
+    '  <td align="center"><a href="http://ebird.org/ebird/map/{species_code}?neg=true&env.minX=-84.70&env.minY=36.20&env.maxX=-70.95&env.maxY=37.22&zh=true&gp=true&ev=Z&mr=1-12&bmo=1&emo=12&yr=all" target="_blank">Map</a></td>\n'
+    '  <td align="center"><a href="http://ebird.org/ebird/GuideMe?cmd=decisionPage&speciesCodes={species_code}&getLocations=states&states=US-VA&bYear=1900&eYear=Cur&bMonth=1&eMonth=12&reportType=species&parentState=US-VA" target="_blank">Chart</a></td>\n'
+    + TR_END
+)
+
+
+def escape_html(text) -> str:
+    """
+    Escape text for use in HTML content or a quoted attribute value.
+
+    Args:
+        text: The text to escape.
+
+    Returns:
+        str: The escaped text.
+    """
+    return str(text).translate(HTML_ESCAPE)
+
 
 def write_taxonomy_header(file_pointer, color, font_size, level, text):
     """
@@ -26,13 +77,13 @@ def write_taxonomy_header(file_pointer, color, font_size, level, text):
     Returns:
         None
     """
-    file_pointer.writelines(
-        [
-            TR_START,
-            f'  <td colspan=6 bgcolor="{color}"><font size="{font_size}">'
-            f"&nbsp&nbsp{level} {text}</font></td>",
-            TR_END,
-        ]
+    file_pointer.write(
+        HEADER_TEMPLATE.format(
+            color=color,
+            font_size=font_size,
+            level=level,
+            text=escape_html(text),
+        )
     )
 
 
@@ -97,17 +148,14 @@ def write_taxon(
         row includes columns for index, common name (as link), scientific name,
         status, map link, and chart link.
     """
-    file_pointer.writelines(
-        [
-            TR_START,
-            f'  <td align="center">{index_text}</font></td>\n',
-            f'  <td align="center"><a href="https://ebird.org/species/{species_code}/US-VA" target="_blank">{common_name}</a></td>\n',
-            f'  <td align="left">&nbsp&nbsp<i>{scientific_name}</font></td>\n',
-            f'  <td align="center">{state_status}</font></td>\n',
-            f'  <td align="center"><a href="http://ebird.org/ebird/map/{species_code}?neg=true&env.minX=-84.70&env.minY=36.20&env.maxX=-70.95&env.maxY=37.22&zh=true&gp=true&ev=Z&mr=1-12&bmo=1&emo=12&yr=all" target="_blank">Map</a></td>\n',
-            f'  <td align="center"><a href="http://ebird.org/ebird/GuideMe?cmd=decisionPage&speciesCodes={species_code}&getLocations=states&states=US-VA&bYear=1900&eYear=Cur&bMonth=1&eMonth=12&reportType=species&parentState=US-VA" target="_blank">Chart</a></td>\n',
-            TR_END,
-        ]
+    file_pointer.write(
+        ROW_TEMPLATE.format(
+            species_code=escape_html(species_code),
+            index_text=index_text,
+            common_name=escape_html(common_name),
+            scientific_name=escape_html(scientific_name),
+            state_status=escape_html(state_status),
+        )
     )
 
 
@@ -119,72 +167,40 @@ def generate_html(official_list_file) -> None:
     Args:
         official_list_file: Path to the CSV file containing bird species data.
     """
-    # Read CSV data
-    with open(official_list_file, "r", encoding="utf-8") as f:
-        birds_data = list(csv.DictReader(f))
     output_file = official_list_file.replace(".csv", ".html")
 
-    with open(output_file, "wt", encoding="utf-8") as html_file:
-        today = date.today().strftime("%B %d, %Y")
-        table_definition = [
-            f"<!-- This table was generated on {today} programmatically by https://github.com/gbabineau/UpdateStateList -->",
-            '<table style="width:100%">\n',
-            '<table border="3">\n',
-            TR_START,
-            '  <td style="width:2%" align="center"><font size="5">#</font></td>\n',
-            '  <td style="width:25%" align="center"><font size="5">Species</font></td>\n',
-            '  <td style="width:22%" align="center"><font size="5">Scientific Name</font></td>\n',
-            '  <td style="width:12%" align="center"><font size="5">State Status</font></td>\n',
-            '  <td style="width:19%" align="center"><font size="5">Spatial Distribution</font></td>\n',
-            '  <td style="width:20%" align="center"><font size="5">Counts & Seasonality</font></td>\n',
-            TR_END,
-        ]
-        html_file.writelines(table_definition)
-
-        # Add data rows
-        current_order = current_family = ""
-        index = 1
-        historically_occurring_section = False
-        for bird in birds_data:
-            # Add historical species row if first occurrence
-            state_status = bird.get("State Status", "")
-            if state_status == "(4)" and not historically_occurring_section:
-                html_file.writelines(
-                    '<tr><td align="center" colspan=6><font size="5">Species Believed to Have Occurred Historically</font></td></tr>\n'
-                )
-                historically_occurring_section = True
-            # Add order row if changed
-            if bird.get("order", "") != current_order:
-                current_order = bird["order"]
-                current_family = ""
-                write_order_header(html_file, current_order)
-
-            # Add family row if changed
-            if bird.get("familyComName", "") != current_family:
-                current_family = bird["familyComName"]
-                write_family_header(html_file, current_family)
-
-            # Add species row
-            species_code = bird.get("speciesCode", "")
-
-            if (
-                bird.get("subspecies", "False").lower() == "false"
-                and not historically_occurring_section
-            ):
-                index_text = str(index)
-                index += 1
+    # Build the page in memory and write it with a single call
+    html = io.StringIO()
+    html.write(
+        TABLE_START_TEMPLATE.format(
+            today=date.today().strftime("%B %d, %Y")
+        )
+    )
+
+    # Add data rows, streaming the CSV rather than reading it all up front
+    with open(official_list_file, "r", encoding="utf-8", newline="") as f:
+        for kind, text, bird in official_list.walk_official_list(
+            csv.DictReader(f)
+        ):
+            if kind == official_list.HISTORICAL:
+                html.write(HISTORICAL_ROW)
+            elif kind == official_list.ORDER:
+                write_order_header(html, text)
+            elif kind == official_list.FAMILY:
+                write_family_header(html, text)
             else:
-                index_text = ""
-
-            write_taxon(
-                html_file,
-                species_code,
-                index_text,
-                bird.get("comName"),
-                bird.get("sciName", ""),
-                state_status,
-            )
-        html_file.writelines("</table>\n")
+                write_taxon(
+                    html,
+                    bird.get("speciesCode", ""),
+                    text,
+                    bird.get("comName"),
+                    bird.get("sciName", ""),
+                    bird.get("State Status", ""),
+                )
+
+    html.write(TABLE_END)
+    with open(output_file, "wt", encoding="utf-8") as html_file:
+        html_file.write(html.getvalue())
     logging.info("Document saved as %s", output_file)
 
 
@@ -192,8 +208,8 @@ def main():
     """
     Main function for the generate_html application.
     This function sets up command-line argument parsing for the
-    update-state-list program. It reads the version from pyproject.toml,
-    configures logging based on verbosity, and processes the official list CSV
+    update-state-list program. It takes the version from the package
+    metadata, configures logging based on verbosity, and processes the official list CSV
     file to generate a HTML document.
     Args:
         None (uses command-line arguments via argparse)
@@ -205,8 +221,7 @@ def main():
     Returns:
         None
     Raises:
-        FileNotFoundError: If pyproject.toml or the specified CSV is not found
-        tomllib.TOMLDecodeError: If pyproject.toml contains invalid TOML syntax
+        FileNotFoundError: If the specified CSV is not found
     """
     arg_parser = parse_common_arguments.parse_common_arguments(
         program_name="generate-html",
@@ -218,6 +233,7 @@ def main():
         help="csv of official list created by update_state_list",
     )
     args = arg_parser.parse_args()
+    parse_common_arguments.configure_logging(args)
     generate_html(args.official_list_csv)
 
 
@@ -1,33 +1,139 @@
-
 """
 This module provides functionality to retrieve and cache the eBird taxonomy using the eBird API.
 """
+import gzip
 import json
+import logging
 
 
 import os
+import time
+
+# The taxonomy is cached per user rather than per working directory so that
+# every run, wherever it is started from, can skip the eBird API round-trip.
+CACHE_DIRECTORY = os.getenv("XDG_CACHE_HOME") or os.path.join(
+    os.path.expanduser("~"), ".cache"
+)
+CACHE_FILE = os.path.join(
+    CACHE_DIRECTORY,
+    "update_state_list",
+    "taxonomy.json.gz",
+)
+# eBird publishes a new taxonomy once a year, so a cache older than that is
+# refetched.
+CACHE_MAX_AGE_DAYS = 365
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def get_taxonomy(ebird_api_key, category=None) -> list:
+    """
+    Fetches the taxonomy from the eBird API.
+
+    The eBird SDK is imported here rather than at module level because it is
+    only needed when the cache is missing, and importing it pulls in most of
+    urllib and roughly doubles the start up time of the applications.
+    Args:
+        ebird_api_key (str): The ebird API key.
+        category (str): Comma separated eBird categories, or None for all.
+
+    Returns:
+        list: The ebird taxonomy.
+    """
+    # pylint: disable=C0415
+    from ebird.api import get_taxonomy as ebird_get_taxonomy
+
+    return ebird_get_taxonomy(ebird_api_key, category=category)
+
 
-from ebird.api import get_taxonomy
+def cache_file_for(category=None) -> str:
+    """
+    Returns the cache file for the taxonomy of the given categories.
+    Args:
+        category (str): Comma separated eBird categories, or None for all.
+
+    Returns:
+        str: The path of the cache file.
+    """
+    if not category:
+        return CACHE_FILE
+    # Only change the file name, so that a ".json" in a directory name is
+    # left alone
+    directory, name = os.path.split(CACHE_FILE)
+    suffix = category.replace(",", "_")
+    return os.path.join(directory, name.replace(".json", f"_{suffix}.json"))
+
+
+def read_cache(cache_file, max_age_days=None):
+    """
+    Reads a cached taxonomy, unless it is missing, too old or unreadable.
+    Args:
+        cache_file (str): The path of the cache file.
+        max_age_days (float): The age in days after which the cache is
+            stale, or None if it never is.
 
-def ebird_taxonomy(ebird_api_key) -> list:
+    Returns:
+        list: The cached taxonomy, or None if it must be fetched again.
+    """
+    try:
+        with gzip.open(cache_file, mode="rb") as f:
+            if max_age_days is not None:
+                age = time.time() - os.fstat(f.fileno()).st_mtime
+                if age > max_age_days * SECONDS_PER_DAY:
+                    return None
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+    # A truncated or corrupt cache raises BadGzipFile (an OSError), EOFError
+    # or a JSON decode error (a ValueError); it is fetched again.
+    except (OSError, EOFError, ValueError) as e:
+        logging.warning("Ignoring unreadable cache %s: %s", cache_file, e)
+        return None
+
+
+def ebird_taxonomy(
+    ebird_api_key, category=None, max_age_days=CACHE_MAX_AGE_DAYS
+) -> list:
     """
     Retrieves the ebird taxonomy.
+
+    The taxonomy is cached as compact, gzip compressed JSON. The eBird
+    taxonomy is very repetitive text, so this keeps the cache small and
+    quick to read back.
     Args:
         ebird_api_key (str): The ebird API key.
+        category (str): Comma separated eBird categories to fetch, for
+            example "species,issf". The eBird API filters the taxonomy so
+            only those entries are downloaded and parsed. Defaults to all.
+        max_age_days (float): The age in days after which the cache is
+            fetched again, or None to keep it forever. A stale cache is
+            still used if the taxonomy cannot be fetched.
 
     Returns:
         list: The ebird taxonomy.
     """
-    taxonomy = []
-    cache_file = ".cache/taxonomy.json"
-    directory = os.path.dirname(cache_file)
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory)
-    if not os.path.isfile(cache_file):
-        taxonomy = get_taxonomy(ebird_api_key)
-        with open(cache_file, encoding="utf-8", mode="wt") as f:
-            json.dump(taxonomy, indent=4, fp=f)
-    else:
-        with open(cache_file, encoding="utf-8", mode="rt") as f:
-            taxonomy = json.load(f)
+    cache_file = cache_file_for(category)
+    taxonomy = read_cache(cache_file, max_age_days)
+    if taxonomy is None:
+        try:
+            taxonomy = get_taxonomy(ebird_api_key, category=category)
+        except (OSError, ValueError) as e:
+            # Keep working from a stale cache when eBird cannot be reached
+            taxonomy = read_cache(cache_file)
+            if taxonomy is None:
+                raise
+            logging.warning(
+                "Using the stale taxonomy cache %s: %s", cache_file, e
+            )
+            return taxonomy
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so an interrupted run never leaves
+        # a truncated cache behind.
+        temporary_file = cache_file + ".tmp"
+        with gzip.open(temporary_file, mode="wb", compresslevel=1) as f:
+            f.write(
+                json.dumps(taxonomy, separators=(",", ":")).encode("utf-8")
+            )
+        os.replace(temporary_file, cache_file)
     return taxonomy
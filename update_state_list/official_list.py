@@ -0,0 +1,61 @@
+"""
+Walk the rows of an official state list in the order they are presented, as
+shared by the docx and HTML generators.
+"""
+
+HISTORICAL = "historical"
+ORDER = "order"
+FAMILY = "family"
+SPECIES = "species"
+
+
+def walk_official_list(birds_data):
+    """
+    Turn the rows of an official state list into the sections of a table.
+
+    A historical marker is emitted before the first species believed to have
+    occurred only historically, and order and family headers whenever they
+    change. Species are numbered, except subspecies and historical species.
+
+    Args:
+        birds_data: Iterable of dicts, one per row of the official list CSV.
+
+    Yields:
+        tuple: (kind, text, bird) where kind is HISTORICAL, ORDER, FAMILY or
+        SPECIES. text is the order or family name for headers, the index
+        text for species and "" for the historical marker. bird is the row
+        for species and None otherwise.
+    """
+    current_order = current_family = ""
+    index = 1
+    historically_occurring_section = False
+    for bird in birds_data:
+        # Add historical species row if first occurrence
+        if (
+            bird.get("State Status", "") == "(4)"
+            and not historically_occurring_section
+        ):
+            yield HISTORICAL, "", None
+            historically_occurring_section = True
+        # Add order row if changed
+        if bird.get("order", "") != current_order:
+            current_order = bird["order"]
+            current_family = ""
+            yield ORDER, current_order, None
+
+        # Add family row if changed
+        if bird.get("familyComName", "") != current_family:
+            current_family = bird["familyComName"]
+            yield FAMILY, current_family, None
+
+        # Add species row; historical species are never numbered, so the
+        # subspecies flag is only looked at before that section
+        if (
+            not historically_occurring_section
+            and bird.get("subspecies", "False").lower() == "false"
+        ):
+            index_text = str(index)
+            index += 1
+        else:
+            index_text = ""
+        yield SPECIES, index_text, bird
@@ -1,7 +1,40 @@
 
 import argparse
-import tomllib
+import functools
 import logging
+from importlib import metadata
+
+DISTRIBUTION_NAME = "update_state_list"
+
+
+@functools.cache
+def get_version() -> str:
+    """
+    Get the version of the applications.
+
+    The version comes from the installed package metadata, which needs no
+    file parsing. When running from a source checkout that is not installed
+    it falls back to reading pyproject.toml. The metadata holds the version
+    in normalised form, so a declared "0.00" is reported as "0.0" once
+    installed. The result is cached, so the lookup happens at most once per
+    process.
+
+    Returns:
+        str: The version, or "0.0.0" if pyproject.toml does not define one.
+    """
+    try:
+        return metadata.version(DISTRIBUTION_NAME)
+    except metadata.PackageNotFoundError:
+        import tomllib
+
+        with open("pyproject.toml", "rb") as f:
+            pyproject_data = tomllib.load(f)
+        return (
+            pyproject_data.get("tool", {})
+            .get("poetry", {})
+            .get("version", "0.0.0")
+        )
+
 
 def parse_common_arguments(
         program_name : str,
@@ -22,18 +55,23 @@ def parse_common_arguments(
     arg_parser = argparse.ArgumentParser(
         prog=program_name, description=description
     )
-    with open("pyproject.toml", "rb") as f:
-        pyproject_data = tomllib.load(f)
-    version = (
-        pyproject_data.get("tool", {}).get("poetry", {}).get("version", "0.0.0")
-    )
+    version = get_version()
     arg_parser.add_argument(
         "--version", action="version", version=f"%(prog)s {version}"
     )
     arg_parser.add_argument(
         "--verbose", action="store_true", help="increase verbosity"
     )
-    args, _ = arg_parser.parse_known_args()
+    return arg_parser
+
+
+def configure_logging(args: argparse.Namespace) -> None:
+    """
+    Configure logging from the parsed common command-line arguments.
+
+    Args:
+        args (argparse.Namespace): Arguments parsed by a parser created with
+            parse_common_arguments.
+    """
     if args.verbose:
         logging.basicConfig(level=logging.INFO)
-    return arg_parser
@@ -7,7 +7,9 @@ can in turn be used for input by the generate_docx utility to create
 a document.
 """
 
+import bisect
 import csv
+import functools
 import logging
 import re
 
@@ -17,51 +19,115 @@ from update_state_list import (
     parse_common_arguments,
 )
 
+# Read/write buffer for the state list CSV files, larger than the 8 KiB default
+# so each file is transferred in few system calls.
+CSV_BUFFER_SIZE = 1024 * 1024
+
+# The start of a parenthetical such as " (Myrtle)" in a common name.
+PARENTHETICAL_PATTERN = re.compile(r"\s*\(")
+
+# eBird taxonomy categories that never appear on a state list.
+EXCLUDED_CATEGORIES = frozenset({"hybrid", "domestic", "spuh", "slash"})
+
+# eBird taxonomy categories below the species level.
+SUBSPECIES_CATEGORIES = frozenset({"issf", "form", "intergrade"})
+
+# Taxon order offset between consecutive non-ISSF subspecies of a species.
+SUBSPECIES_ORDER_STEP = 0.01
+
+# eBird taxonomy categories requested from the eBird API, so that the
+# excluded categories are never downloaded or parsed.
+TAXONOMY_CATEGORIES = "species,issf,form,intergrade"
+
+# The fields of an eBird taxon that are used to update a state list. The
+# eBird taxonomy carries many more (banding codes, name codes, report-as
+# and so on) which are dropped so that only what is needed stays in memory.
+TAXON_FIELDS = (
+    "comName",
+    "sciName",
+    "speciesCode",
+    "order",
+    "familyComName",
+    "taxonOrder",
+    "category",
+)
+
+# The fields copied from the matching taxon into each bird of the state list.
+COPIED_FIELDS = (
+    "sciName",
+    "speciesCode",
+    "order",
+    "familyComName",
+    "taxonOrder",
+)
+
+OUTPUT_FIELDNAMES = (
+    "comName",
+    "sciName",
+    "State Status",
+    "speciesCode",
+    "order",
+    "familyComName",
+    "taxonOrder",
+    "subspecies",
+    "Sort as",
+)
+
+
+def output_sort_key(bird) -> tuple[bool, float]:
+    """
+    Sort key placing birds in taxonomic order, with historical birds last.
+
+    Args:
+        bird (dict): Bird data with optional 'State Status' and 'taxonOrder'.
+
+    Returns:
+        tuple[bool, float]: Whether the bird is only believed to have occurred
+            historically (State Status "(4)") and its taxonOrder as a float,
+            since taxonOrder may be read from the taxonomy as a string.
+    """
+    return bird.get("State Status") == "(4)", float(bird.get("taxonOrder", 0))
+
 
 def create_output_file(updated_bird_data, common_names_file) -> None:
     """
     Create an output CSV file with updated bird data sorted by taxonomic order.
     This function takes the updated bird data and writes it to a new CSV file
-    with a standardized set of fields. The output filename is derived from the
+    with the standardized OUTPUT_FIELDNAMES columns; fields missing from a
+    bird are written as empty values. The output filename is derived from the
     input common names file by appending '_updated' before the file extension.
     Args:
-        updated_bird_data (list[dict]): A list of dictionaries with bird data.
-            Each dictionary should contain keys like 'comName', 'sciName',
-            'State Status', 'speciesCode', 'order', 'familyComName',
-            'taxonOrder', and 'subspecies'.
+        updated_bird_data (Iterable[dict]): Dictionaries with bird data, in
+            any order; a list is sorted in place. Each dictionary should
+            contain keys like 'comName', 'sciName', 'State Status',
+            'speciesCode', 'order', 'familyComName', 'taxonOrder', and
+            'subspecies'.
         common_names_file (str): The path to the original common names CSV file.
             Used to determine the output filename.
     Returns:
         None: This function does not return a value but writes data to a file
             and logs the operation.
     """
-    # Sort updated_bird_data by taxonOrder
-    # Sort by taxonOrder, but place birds with State Status "(4)" at the end
-    updated_bird_data.sort(
-        key=lambda x: (
-            x.get("State Status") == "(4)",
-            float(x.get("taxonOrder", 0)),
-        )
-    )
-    # updated_bird_data.sort(key=lambda x: float(x.get("taxonOrder", 0)))
+    # Sort a list in place so that no second list of birds is built
+    if not isinstance(updated_bird_data, list):
+        updated_bird_data = list(updated_bird_data)
+    updated_bird_data.sort(key=output_sort_key)
 
     output_file = common_names_file.replace(".csv", "_updated.csv")
-    with open(output_file, "w", encoding="utf-8", newline="") as f:
+    with open(
+        output_file,
+        "w",
+        encoding="utf-8",
+        newline="",
+        buffering=CSV_BUFFER_SIZE,
+    ) as f:
         if updated_bird_data:
-            fieldnames = [
-                "comName",
-                "sciName",
-                "State Status",
-                "speciesCode",
-                "order",
-                "familyComName",
-                "taxonOrder",
-                "subspecies",
-                "Sort as",
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(updated_bird_data)
+            writer = csv.writer(f)
+            writer.writerow(OUTPUT_FIELDNAMES)
+            writer.writerows(
+                [bird.get(field) for field in OUTPUT_FIELDNAMES]
+                for bird in updated_bird_data
+            )
     logging.info("Updated data written to %s", output_file)
 
 
@@ -69,9 +135,11 @@ def get_taxonomy_of_interest(api_key) -> list:
     """
     Retrieves and filters the eBird taxonomy to include only birds of interest.
 
-    This function fetches the complete eBird taxonomy using the provided API
-    key, then filters out hybrid and domestic bird species, returning only wild
-    species that are relevant for state bird lists.
+    This function fetches the eBird taxonomy of TAXONOMY_CATEGORIES using the
+    provided API key, then filters out hybrid and domestic birds as well as
+    spuhs and slashes, returning only taxa that are relevant for state bird
+    lists.
+    Each taxon is trimmed to the TAXON_FIELDS used to update the list.
 
     Args:
         api_key (str): A valid eBird API key for authentication.
@@ -80,12 +148,15 @@ def get_taxonomy_of_interest(api_key) -> list:
         list: A list of dictionaries containing taxonomy information for each
             species.
     """
-    taxonomy = get_taxonomy.ebird_taxonomy(api_key)
-    # remove hybrids and domestic birds from the taxonomy as they are not in the state list
+    taxonomy = get_taxonomy.ebird_taxonomy(
+        api_key, category=TAXONOMY_CATEGORIES
+    )
+    # remove hybrids, domestic birds, spuhs and slashes from the taxonomy as
+    # they are not in the state list
     taxonomy = [
-        t
+        {field: t.get(field) for field in TAXON_FIELDS}
         for t in taxonomy
-        if t.get("category") != "hybrid" and t.get("category") != "domestic"
+        if t.get("category") not in EXCLUDED_CATEGORIES
     ]
     return taxonomy
 
@@ -107,23 +178,132 @@ def read_input_file(common_names_file) -> list:
         UnicodeDecodeError: If the file cannot be decoded with UTF-8 encoding.
     """
     birds_data = []
-    with open(common_names_file, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        birds_data = list(reader)
+    with open(
+        common_names_file,
+        "r",
+        encoding="utf-8",
+        newline="",
+        buffering=CSV_BUFFER_SIZE,
+    ) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        birds_data = [dict(zip(header, row)) for row in reader if row]
     return birds_data
 
 
-def get_matching_taxon(common_name, taxonomy) -> tuple[list, bool]:
+def index_taxonomy(taxonomy) -> dict:
+    """
+    Index the taxonomy by common name for constant time lookups.
+
+    Args:
+        taxonomy (list): A list of dictionaries containing taxonomic
+            information, where each dictionary should have a "comName" key.
+
+    Returns:
+        dict: Mapping of common name to taxon, in taxonomic order. If a common
+            name appears more than once the first taxon is kept.
+    """
+    taxonomy_by_name = {}
+    for taxon in taxonomy:
+        taxonomy_by_name.setdefault(taxon.get("comName", ""), taxon)
+    return taxonomy_by_name
+
+
+def sort_taxonomy_names(taxonomy_by_name) -> list:
+    """
+    Sort the common names of the taxonomy for prefix searches.
+
+    Args:
+        taxonomy_by_name (dict): Taxonomy indexed by common name as returned
+            by index_taxonomy.
+
+    Returns:
+        list[tuple[str, int]]: The common names in sorted order, each with
+            its position in the taxonomy.
+    """
+    return sorted(
+        (name, position) for position, name in enumerate(taxonomy_by_name)
+    )
+
+
+def get_first_taxon_with_prefix(
+    prefix, taxonomy_by_name, sorted_names
+) -> dict | None:
     """
-    Find a matching taxon entry from the taxonomy list based on common name.
-    This function attempts to find a taxon in the taxonomy list by matching the
-    common name. If an exact match is not found, it tries to match using a base
-    name (the part before the first non-alphabetic character, excluding spaces
-    and hyphens).
+    Find the first taxon, in taxonomic order, whose name starts with a prefix.
+
+    The names starting with the prefix are adjacent in sorted order, so they
+    are found by a binary search rather than a scan of the whole taxonomy.
+
+    Args:
+        prefix (str): The start of the common name.
+        taxonomy_by_name (dict): Taxonomy indexed by common name as returned
+            by index_taxonomy.
+        sorted_names (list): The names as returned by sort_taxonomy_names.
+
+    Returns:
+        dict or None: The matching taxon, or None if no name has the prefix.
+    """
+    first = None
+    index = bisect.bisect_left(sorted_names, (prefix,))
+    while index < len(sorted_names) and sorted_names[index][0].startswith(
+        prefix
+    ):
+        if first is None or sorted_names[index][1] < first[1]:
+            first = sorted_names[index]
+        index += 1
+    return None if first is None else taxonomy_by_name[first[0]]
+
+
+def get_longest_prefix_taxon(common_name, taxonomy_by_name) -> dict | None:
+    """
+    Find the taxon named by the longest run of leading words of a common name.
+
+    Only words from the parenthetical on are dropped, so for "Yellow-rumped
+    Warbler (Myrtle x Audubon)" this tries "Yellow-rumped Warbler (Myrtle x",
+    "Yellow-rumped Warbler (Myrtle" and then "Yellow-rumped Warbler",
+    stopping at the first name that is in the taxonomy. A name without a
+    parenthetical, such as "Willet Eastern", is never shortened. Each try is
+    a single dictionary lookup, so the cost depends on the number of words in
+    the name, not the size of the taxonomy.
+
     Args:
         common_name (str): The common name of the species to search for.
-        taxonomy (list): A list of dictionaries containing taxonomic information, where each
-                            dictionary should have at least a "comName" key.
+        taxonomy_by_name (dict): Taxonomy indexed by common name as returned
+            by index_taxonomy.
+
+    Returns:
+        dict or None: The matching taxon, or None if no leading words match.
+    """
+    parenthetical = PARENTHETICAL_PATTERN.search(common_name)
+    if not parenthetical:
+        return None
+    end = common_name.rfind(" ")
+    while end >= parenthetical.start() and end > 0:
+        taxon = taxonomy_by_name.get(common_name[:end])
+        if taxon:
+            return taxon
+        end = common_name.rfind(" ", 0, end)
+    return None
+
+
+def get_matching_taxon(
+    common_name, taxonomy_by_name, get_sorted_names=None
+) -> tuple[list, bool]:
+    """
+    Find a matching taxon entry from the taxonomy based on common name.
+    This function attempts to find a taxon in the taxonomy by matching the
+    common name. If an exact match is not found, it tries the longest run of
+    leading words, up to or inside a parenthetical, that is a taxon name and
+    then any taxon whose name starts with the base name (the part before a
+    parenthetical such as " (Myrtle)").
+    Args:
+        common_name (str): The common name of the species to search for.
+        taxonomy_by_name (dict): Taxonomy indexed by common name as returned
+            by index_taxonomy.
+        get_sorted_names (callable, optional): Returns the names as returned
+            by sort_taxonomy_names. It is only called when a prefix search is
+            needed, so pass a cached one when matching many names.
     Returns:
         tuple[list, bool]: A tuple containing:
             - matching_taxon (dict or None): The matching taxonomy dictionary.
@@ -132,87 +312,129 @@ def get_matching_taxon(common_name, taxonomy) -> tuple[list, bool]:
     Raises:
         None: Logs an error message if no matching taxon is found.
     """
-    matching_taxon = next(
-        (t for t in taxonomy if t.get("comName") == common_name), None
-    )
+    matching_taxon = taxonomy_by_name.get(common_name)
+    if matching_taxon:
+        return matching_taxon, False
 
+    # Try the longest leading words that name a taxon, then any taxon
+    # starting with the part before the parenthetical
+    matching_taxon = get_longest_prefix_taxon(common_name, taxonomy_by_name)
     if matching_taxon:
-        non_issf_subspecies = False
+        return matching_taxon, True
+
+    base_name = common_name
+    if parenthetical := PARENTHETICAL_PATTERN.search(common_name):
+        base_name = common_name[: parenthetical.start()]
+    base_name = base_name.strip()
+    if get_sorted_names is None:
+        sorted_names = sort_taxonomy_names(taxonomy_by_name)
     else:
-        # Try to find a match using only the part before the first non-alphabetic character
-        base_name = re.split(r"[^a-zA-Z\s\-]", common_name)[0].strip()
-        matching_taxon = next(
-            (t for t in taxonomy if t.get("comName", "").startswith(base_name)),
-            None,
+        sorted_names = get_sorted_names()
+    matching_taxon = get_first_taxon_with_prefix(
+        base_name, taxonomy_by_name, sorted_names
+    )
+    if not matching_taxon:
+        logging.error(
+            "No match found for '%s' (base name: '%s').",
+            common_name,
+            base_name,
         )
-        non_issf_subspecies = True
-        if not matching_taxon:
-            logging.error(
-                "No match found for '%s' (base name: '%s').",
-                common_name,
-                base_name,
-            )
-    return matching_taxon, non_issf_subspecies
+    return matching_taxon, True
 
 
-def update_state_list(common_names_file) -> None:
+def get_search_name(bird) -> str:
     """
-    Update bird state list data with taxonomy information from eBird API.
-    This function reads a file containing bird common names, retrieves the
-    corresponding taxonomy data from the eBird API, and updates each bird record
-    with scientific names, species codes, taxonomic order, and family
-    information. It handles both regular species and non-ISSF  subspecies by
-    adjusting their taxonomic order values.
+    Returns the name used to find a bird in the eBird taxonomy.
+
     Args:
-        common_names_file: Path to the input file with bird common names data.
+        bird (dict): A row of the state list.
+
     Returns:
-        None. The function writes the updated bird data to an output file.
+        str: The 'Sort as' name if given, otherwise the common name.
+    """
+    return bird.get("Sort as") or bird.get("comName", "")
+
+
+def apply_taxonomy(birds_data, taxonomy_by_name) -> list:
+    """
+    Update birds of a state list with information from the eBird taxonomy.
+    Each bird is matched against the taxonomy and gets the scientific name,
+    species code, taxonomic order and family of its taxon. Birds without a
+    match are logged and left out.
+    Args:
+        birds_data (Iterable[dict]): The rows of the state list, in list
+            order. They are read once, so a stream of rows works as well as
+            a list, and are updated in place.
+        taxonomy_by_name (dict): Taxonomy indexed by common name as returned
+            by index_taxonomy.
+    Returns:
+        list[dict]: The birds that matched a taxon, in list order.
     Notes:
         - Non-ISSF subspecies are assigned incremental taxon order offsets
           to maintain proper ordering relative to their parent species.
     """
-    api_key = get_ebird_api_key.get_ebird_api_key()
-    taxonomy = get_taxonomy_of_interest(api_key)
-    birds_data = read_input_file(common_names_file)
+    # Memoize matches for this run only, so repeated names are resolved once,
+    # and only sort the names the first time a prefix search needs them
+    find_matching_taxon = functools.cache(
+        functools.partial(
+            get_matching_taxon,
+            taxonomy_by_name=taxonomy_by_name,
+            get_sorted_names=functools.cache(
+                functools.partial(sort_taxonomy_names, taxonomy_by_name)
+            ),
+        )
+    )
     updated_bird_data = []
-    non_issf_subspecies_order_keeper = 0
+    # Number of consecutive non-ISSF subspecies so far
+    non_issf_subspecies_count = 0
     for bird in birds_data:
-        if sort_as := bird.get("Sort as"):
-            bird_for_search = sort_as
-        else:
-            bird_for_search = bird.get("comName", "")
-
-        matching_taxon, non_issf_subspecies = get_matching_taxon(
-            bird_for_search, taxonomy=taxonomy
+        common_name = bird.get("comName", "")
+        matching_taxon, non_issf_subspecies = find_matching_taxon(
+            get_search_name(bird)
         )
         if matching_taxon is None:
-            logging.error("No matching taxon for %s", bird.get("comName"))
+            logging.error("No matching taxon for %s", common_name)
         else:
-            non_issf_subspecies = non_issf_subspecies or "(" in bird.get(
-                "comName"
-            )
-            for copied_field in [
-                "sciName",
-                "speciesCode",
-                "order",
-                "familyComName",
-                "taxonOrder",
-            ]:
+            non_issf_subspecies = non_issf_subspecies or "(" in common_name
+            for copied_field in COPIED_FIELDS:
                 bird[copied_field] = matching_taxon.get(copied_field)
             if non_issf_subspecies:
-                non_issf_subspecies_order_keeper = (
-                    non_issf_subspecies_order_keeper + 0.01
-                )
+                non_issf_subspecies_count += 1
+                # Scale the count rather than summing 0.01 steps, so the
+                # rounding error does not grow along a run of subspecies
                 bird["taxonOrder"] = (
-                    bird["taxonOrder"] + non_issf_subspecies_order_keeper
+                    bird["taxonOrder"]
+                    + non_issf_subspecies_count * SUBSPECIES_ORDER_STEP
                 )
                 bird["subspecies"] = True
             else:
-                non_issf_subspecies_order_keeper = 0
-                bird["subspecies"] = matching_taxon.get("category") == "issf"
+                non_issf_subspecies_count = 0
+                bird["subspecies"] = (
+                    matching_taxon.get("category") in SUBSPECIES_CATEGORIES
+                )
 
             updated_bird_data.append(bird)
+    return updated_bird_data
+
 
+def update_state_list(common_names_file) -> None:
+    """
+    Update bird state list data with taxonomy information from eBird API.
+    This function reads a file containing bird common names, retrieves the
+    corresponding taxonomy data from the eBird API, and updates each bird record
+    with scientific names, species codes, taxonomic order, and family
+    information using apply_taxonomy.
+    Args:
+        common_names_file: Path to the input file with bird common names data.
+    Returns:
+        None. The function writes the updated bird data to an output file.
+    """
+    api_key = get_ebird_api_key.get_ebird_api_key()
+    # Read the input file before the taxonomy, which may have to be
+    # downloaded, so that a bad input file fails straight away
+    birds_data = read_input_file(common_names_file)
+    taxonomy_by_name = index_taxonomy(get_taxonomy_of_interest(api_key))
+    updated_bird_data = apply_taxonomy(birds_data, taxonomy_by_name)
     create_output_file(updated_bird_data, common_names_file)
 
 
@@ -220,9 +442,10 @@ def main():
     """
     Main function for the app.
     This function sets up the command-line argument parser for the
-    update-state-list tool, which updates elements of a state list. It reads
-    the version from pyproject.toml, configures logging based on verbosity flag,
-    and calls update_state_list with the provided common names file.
+    update-state-list tool, which updates elements of a state list. It takes
+    the version from the package metadata, configures logging based on
+    verbosity flag, and calls update_state_list with the provided common
+    names file.
     Args:
         None
     Returns:
@@ -233,8 +456,7 @@ def main():
         --common_names_file: Path to the file containing list of birds for a
         region/time frame (required)
     Raises:
-        FileNotFoundError: If pyproject.toml or common_names_file are not found
-        tomllib.TOMLDecodeError: If pyproject.toml is not valid TOML format
+        FileNotFoundError: If common_names_file is not found
     """
     arg_parser = parse_common_arguments.parse_common_arguments(
         program_name="update-state-list",
@@ -246,6 +468,7 @@ def main():
         help="list of birds had for a region/time frame",
     )
     args = arg_parser.parse_args()
+    parse_common_arguments.configure_logging(args)
     update_state_list(args.common_names_file)
 
 